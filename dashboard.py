@@ -11,9 +11,11 @@ Features:
 """
 from __future__ import annotations
 import os
-import re
 from datetime import date, datetime, timedelta
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
@@ -23,31 +25,79 @@ import etl as etl
 
 # --- CONFIGURATION ---
 OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "output")
+WEEK_HOURS_BEFORE_DAY = np.array([0.0, 8.0, 16.0, 24.0, 32.0, 38.0, 38.0]) # Cumulative work hours before each weekday (Mon=0)
+PROPOSAL_TEXT_COLUMNS = {"Date": pa.string(), "Start": pa.string(), "End": pa.string()} # Keep timestamps as written in the CSV
+GANTT_WEBGL_THRESHOLD = 500 # Above this many bars the weekly Gantt is drawn as WebGL segments
 
 # ------------------------------
 # Caching
 # ------------------------------
-@st.cache_data
-def load_etl_data():
-    """Cached function to load all source data from Excel files."""
+@st.cache_data(max_entries=2, show_spinner=False)
+def load_etl_data(version: tuple):
+    """Cached function to load all source data from Excel files; keyed on their modification times."""
     try:
         return etl.load_data()
-    except FileNotFoundError as e:
+    except (OSError, ValueError, pa.ArrowException) as e:
         st.error(f"Failed to load source data: {e}. Please ensure Excel files are in {etl.DATA_DIR}")
         return None
 
+@st.cache_data(max_entries=4, show_spinner=False)
+def get_operators_cached(version: tuple, _data: dict) -> list:
+    """Cached (code, short name) operator list for the availability selectors; the source data is keyed by `version`."""
+    return etl.get_all_operators(data=_data)
+
+@st.cache_data(max_entries=24, show_spinner=False)
+def summarize_demand_cached(year: int, month: int, version: tuple, _data: dict) -> pd.DataFrame:
+    """Cached demand summary keyed by (year, month, source version); the source data itself is not hashed."""
+    return etl.summarize_demand(year, month, data=_data)
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def load_manifest(version: tuple) -> list:
+    """Cached proposals manifest; keyed on the manifest and output folder mtimes so a new ETL run invalidates it."""
+    return etl.read_manifest(OUTPUT_DIR)
+
 # ------------------------------
 # Helpers
 # ------------------------------
 def read_csv_safe(path: str) -> pd.DataFrame:
-    """Safely reads a CSV, returning an empty DataFrame if it doesn't exist or is empty."""
-    if not os.path.exists(path):
-        return pd.DataFrame()
+    """Safely reads a CSV with pyarrow, returning an empty DataFrame if it doesn't exist or is empty."""
     try:
-        return pd.read_csv(path)
-    except pd.errors.EmptyDataError:
+        return pacsv.read_csv(path, convert_options=pacsv.ConvertOptions(column_types=PROPOSAL_TEXT_COLUMNS)).to_pandas()
+    except (FileNotFoundError, pa.ArrowInvalid):
         return pd.DataFrame()
 
+def weekly_gantt_figure(g: pd.DataFrame) -> go.Figure:
+    """Builds the weekly Gantt as one bar trace per legend entry, or as WebGL line segments for large schedules."""
+    palette = px.colors.qualitative.Plotly
+    codes, legends = pd.factorize(g["Legend"])
+    fig = go.Figure()
+    for code, legend in enumerate(legends):
+        grp = g[codes == code]
+        color = palette[code % len(palette)]
+        if len(g) > GANTT_WEBGL_THRESHOLD:
+            # Each task is a start/end point pair followed by a NaN break
+            x = np.column_stack([grp["StartH"], grp["StartH"] + grp["DurH"], np.full(len(grp), np.nan)]).ravel()
+            y = np.repeat(grp["OperatorShortName"].to_numpy(), 3)
+            fig.add_trace(go.Scattergl(x=x, y=y, mode="lines", name=str(legend), line=dict(width=12, color=color),
+                                       hovertemplate=f"{legend}<extra></extra>"))
+        else:
+            fig.add_trace(go.Bar(
+                y=grp["OperatorShortName"], x=grp["DurH"], base=grp["StartH"], orientation='h', name=str(legend),
+                marker_color=color, marker_line_width=0, text=str(legend), hovertemplate=f"{legend}<extra></extra>"
+            ))
+    fig.update_layout(uirevision="week", barmode="overlay", bargap=0.05, uniformtext_minsize=8, uniformtext_mode="hide")
+    return fig
+
+@st.fragment
+def etl_runner(the_date: date, available_operators_by_day: dict, data: dict) -> None:
+    """ETL button as a fragment: the click reruns only this block while proposals are generated."""
+    if st.button("Generate Weekly Proposals"):
+        with st.status("Running Weekly ETL...", expanded=True) as status:
+            files = etl.generate_weekly_proposals(the_date, available_operators_by_day, n_proposals=3, data=data)
+            status.update(label=f"Generated {len(files)} weekly proposals.", state="complete")
+        # Full rerun so the Planning tab picks up the new files
+        st.rerun()
+
 # ------------------------------
 # Main UI
 # ------------------------------
@@ -55,13 +105,15 @@ def main():
     st.set_page_config(page_title="Weekly Production Planning", layout="wide")
     st.title("Weekly Production Planning")
 
-    all_data = load_etl_data()
+    data_version = etl.source_version()
+    all_data = load_etl_data(data_version)
     if not all_data or 'products' not in all_data:
         st.error("Essential data ('products.xlsx') is missing. Please update etl.py and ensure all source files are present.")
         return
 
-    subsystem_info = all_data["products"][["Product", "Subsystem", "SubsystemShortDesc"]].drop_duplicates()
-    operator_info = all_data["training"][["Operator", "OperatorShortName"]].drop_duplicates()
+    # Keyed on text: proposal CSVs read codes back as numbers even when the source stored them as text
+    subsystem_names = all_data["products"].drop_duplicates(["Product", "Subsystem"]).astype({"Product": str, "Subsystem": str}).set_index(["Product", "Subsystem"])["SubsystemShortDesc"]
+    operator_names = all_data["training"].drop_duplicates("Operator").set_index("Operator")["OperatorShortName"]
 
     # --- Sidebar ---
     with st.sidebar:
@@ -75,7 +127,7 @@ def main():
         
         available_operators_by_day = {}
         try:
-            all_ops = etl.get_all_operators()
+            all_ops = get_operators_cached(data_version, all_data)
             op_map = {f"{short_name} ({code})": code for code, short_name in all_ops}
             
             for i in range(5):
@@ -99,10 +151,7 @@ def main():
 
         st.divider()
         st.subheader("ETL")
-        if st.button("Generate Weekly Proposals"):
-            with st.spinner("Running Weekly ETL..."):
-                etl.generate_weekly_proposals(the_date, available_operators_by_day, n_proposals=3)
-            st.success("Weekly proposals generated."); st.rerun()
+        etl_runner(the_date, available_operators_by_day, all_data)
 
     # --- Main Content Tabs ---
     planning_tab, demand_tab = st.tabs(["Planning", "Demand"])
@@ -110,7 +159,7 @@ def main():
     # --- Demand Tab ---
     with demand_tab:
         st.header("Demand Analysis")
-        demand_summary = etl.summarize_demand(year, month)
+        demand_summary = summarize_demand_cached(year, month, data_version, all_data)
         if not demand_summary.empty:
             st.subheader("Monthly-Weekly Demand")
             st.dataframe(demand_summary, use_container_width=True, hide_index=True)
@@ -137,47 +186,51 @@ def main():
     with planning_tab:
         st.header("Operational Planning")
         
-        proposal_prefix = f"planning_week_{monday.strftime('%Y%m%d')}_proposal"
-        
-        try:
-            weekly_files = [f for f in os.listdir(OUTPUT_DIR) if f.startswith(proposal_prefix)]
-            if not weekly_files:
-                st.info("No proposals found. Configure availability and run the ETL."); return
-        except FileNotFoundError:
+        if not os.path.isdir(OUTPUT_DIR):
             st.info("Output directory not found. Run the ETL to create it."); return
+        # Without a manifest (proposals from before it existed) the entries come from the file names,
+        # so the folder mtime is part of the key as well
+        manifest_path = os.path.join(OUTPUT_DIR, etl.MANIFEST_NAME)
+        manifest_mtime = os.stat(manifest_path).st_mtime_ns if os.path.exists(manifest_path) else None
+        manifest = load_manifest((manifest_mtime, os.stat(OUTPUT_DIR).st_mtime_ns))
+        week_files = {e["proposal_id"]: e["file"] for e in manifest if e["monday"] == monday.isoformat()}
+        if not week_files:
+            st.info("No proposals found. Configure availability and run the ETL."); return
 
-        prop_ids = sorted({int(re.search(r'_proposal(\d+)\.csv', p).group(1)) for p in weekly_files})
         st.subheader("Choose Proposal")
-        prop_choice = st.radio(" ", [f"Proposal {i}" for i in prop_ids], horizontal=True, label_visibility="collapsed")
+        prop_choice = st.radio(" ", [f"Proposal {i}" for i in sorted(week_files)], horizontal=True, label_visibility="collapsed")
         chosen_prop_id = int(prop_choice.split()[-1])
 
-        weekly_path = os.path.join(OUTPUT_DIR, f"{proposal_prefix}{chosen_prop_id}.csv")
+        weekly_path = os.path.join(OUTPUT_DIR, week_files[chosen_prop_id])
         weekly_df_raw = read_csv_safe(weekly_path)
 
         if not weekly_df_raw.empty:
-            weekly_df_display = pd.merge(weekly_df_raw, operator_info, on="Operator", how="left")
-            weekly_df_display = pd.merge(weekly_df_display, subsystem_info, on=["Product", "Subsystem"], how="left")
+            weekly_df_display = weekly_df_raw
+            weekly_df_display["OperatorShortName"] = weekly_df_display["Operator"].map(operator_names)
+            sub_idx = pd.MultiIndex.from_frame(weekly_df_display[["Product", "Subsystem"]].astype(str))
+            weekly_df_display["SubsystemShortDesc"] = subsystem_names.reindex(sub_idx).to_numpy()
             display_cols = ["Date", "OperatorShortName", "Product", "SubsystemShortDesc", "Workcell", "Start", "End"]
             
             st.subheader(f"Weekly Plan: Week of {monday.strftime('%Y-%m-%d')}")
             st.dataframe(weekly_df_display[[c for c in display_cols if c in weekly_df_display.columns]], use_container_width=True, hide_index=True)
 
             st.subheader("Weekly Gantt Chart")
-            g_weekly = pd.merge(weekly_df_raw, operator_info, on="Operator", how="left")
-            g_weekly = pd.merge(g_weekly, subsystem_info, on=["Product", "Subsystem"], how="left")
-            g_weekly["Legend"] = g_weekly["Subsystem"].astype(str) + " - " + g_weekly["SubsystemShortDesc"].fillna("") + " - " + g_weekly["Workcell"].astype(str)
+            g_weekly = weekly_df_display
+            # Legend strings are built once per distinct (subsystem, desc, workcell) and stored as a categorical
+            legend_parts = g_weekly[["Subsystem", "SubsystemShortDesc", "Workcell"]].astype(object).fillna("").astype(str)
+            legend_codes, legend_keys = pd.MultiIndex.from_frame(legend_parts).factorize()
+            legend_labels = np.array([" - ".join(key) for key in legend_keys], dtype=object)
+            g_weekly["Legend"] = pd.Categorical(legend_labels[legend_codes])
             g_weekly["Start"] = pd.to_datetime(g_weekly["Start"])
             
-            def cum_hours(dt): 
-                wd = int(dt.weekday()); base = sum([8.0, 8.0, 8.0, 8.0, 6.0][:wd])
-                within = (dt - dt.replace(hour=8, minute=0, second=0, microsecond=0)).total_seconds() / 3600.0
-                return base + within
-            
-            g_weekly["StartH"] = g_weekly["Start"].apply(cum_hours)
-            g_weekly["DurH"] = g_weekly["DurationHours"]
+            # Week hours since Monday 08:00, counting only working hours of previous days
+            base = WEEK_HOURS_BEFORE_DAY[g_weekly["Start"].dt.weekday.to_numpy()]
+            within = (g_weekly["Start"] - g_weekly["Start"].dt.normalize()).dt.total_seconds().to_numpy() / 3600.0 - 8.0
+            g_weekly["StartH"] = base + within
+            g_weekly["DurH"] = g_weekly["DurationHours"].astype(float)
 
             x_range_weekly = st.slider("Select hour range for weekly view", 0, 38, (0, 38))
-            fig_weekly = px.bar(g_weekly, y="OperatorShortName", x="DurH", base="StartH", color="Legend", orientation='h', text="Legend")
+            fig_weekly = weekly_gantt_figure(g_weekly)
             fig_weekly.update_yaxes(autorange="reversed", title_text="Operator")
             fig_weekly.update_xaxes(range=x_range_weekly, title_text="Week hours (Mon start)")
             
@@ -1,7 +1,7 @@
 """
 ETL/Planning optimizer for shop-floor scheduling (Weekly Focus).
 
-Reads Excel files from a configured directory and generates weekly planning proposals.
+Reads Excel files (cached as Parquet) from a configured directory and generates weekly planning proposals.
 Constraints:
 - Operators only work on modules they're trained for (from training.xlsx)
 - Operators can be excluded via availability list (passed as parameter for each day).
@@ -10,36 +10,114 @@ Constraints:
 - 15-minute time granularity
 """
 from __future__ import annotations
+import contextlib
+import functools
+import json
 import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import date, datetime, time, timedelta
 from typing import List, Dict, Tuple, Set
 import numpy as np
 import pandas as pd
+from numba import njit
+from pandas.api.types import union_categoricals
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
 
 # --- CONFIGURATION ---
 DATA_DIR = r"C:\Users\...\planning\data" # Path to the folder containing input Excel files
 OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "output") # Output folder for generated proposals
 TIME_STEP_MIN = 15 # Time granularity in minutes
 START_TIME = time(8, 0) # Workday start time
+MANIFEST_NAME = "manifest.json" # Index of generated proposals inside OUTPUT_DIR
+
+# Source columns used downstream, per input table (Parquet reads project only these)
+REQUIRED_COLS = {
+    "demand": ["Any", "Mes", "CodiProjecte", "Unitats"],
+    "stations": ["CodiProjecte", "CodiModul", "UT"],
+    "times": ["CodiProjecte", "CodiModul", "TempsEstandar"],
+    "training": ["CodiProjecte", "CodiModul", "Usuari", "NomCurt"],
+    "products": ["CodiProjecte", "CodiModul", "ModulCode"],
+}
+OPTIONAL_COLS = {"demand": ["DescripcioProjecte"]} # Read when present, never required
+# Key/label columns stored as categoricals sharing one category set across all tables
+CATEGORY_COLS = ["Product", "Subsystem", "Operator", "Workcell", "OperatorShortName", "SubsystemShortDesc"]
+_MANIFEST_THREAD_LOCK = threading.Lock()
 
 # ------------------------------
 # IO helpers
 # ------------------------------
 
-def _read_excel(name: str, sheet: str) -> pd.DataFrame:
-    path = os.path.join(DATA_DIR, name)
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Missing required file: {path}")
-    return pd.read_excel(path, sheet_name=sheet)
+def _source_columns(name: str, available) -> List[str]:
+    missing = [c for c in REQUIRED_COLS[name] if c not in available]
+    if missing:
+        raise ValueError(f"{name}.xlsx is missing required columns: {', '.join(missing)}")
+    return REQUIRED_COLS[name] + [c for c in OPTIONAL_COLS.get(name, []) if c in available]
+
+def _read_source(name: str, sheet: str) -> pd.DataFrame:
+    """Read `<name>.xlsx` through its Parquet copy, (re)building the copy when it is missing, unreadable or stale."""
+    xlsx_path = os.path.join(DATA_DIR, f"{name}.xlsx")
+    parquet_path = os.path.join(DATA_DIR, f"{name}.parquet")
+    # The copy records the (mtime, size) of the workbook it was built from: a restored older workbook does not match
+    st = os.stat(xlsx_path)
+    source_stamp = f"{st.st_mtime_ns}:{st.st_size}".encode()
+    try:
+        schema = pq.read_schema(parquet_path)
+        if (schema.metadata or {}).get(b"source_stamp") == source_stamp:
+            return pd.read_parquet(parquet_path, engine="pyarrow", columns=_source_columns(name, schema.names))
+    except (OSError, pa.ArrowException):
+        pass # missing or damaged (e.g. truncated) copy: rebuild it below
+    df = pd.read_excel(xlsx_path, sheet_name=sheet, engine="calamine")
+    # Mixed-type columns (e.g. numeric codes next to 'A-100') have no Arrow type; store them as text
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].astype("string")
+    tmp_path = None
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({**table.schema.metadata, b"source_stamp": source_stamp})
+        # Unique tmp name: concurrent rebuilds never write into (and publish) each other's half-written file
+        fd, tmp_path = tempfile.mkstemp(prefix=f"{name}.", suffix=".parquet.tmp", dir=DATA_DIR)
+        os.close(fd)
+        pq.write_table(table, tmp_path, compression="zstd", use_dictionary=True)
+        os.replace(tmp_path, parquet_path)
+    except (OSError, pa.ArrowException):
+        # Read-only or otherwise unwritable DATA_DIR: keep working from the Excel file without a cache
+        if tmp_path and os.path.exists(tmp_path): os.remove(tmp_path)
+    return df[_source_columns(name, df.columns)]
+
+@functools.lru_cache(maxsize=32)
+def _read_table_cached(name: str, sheet: str, mtime: float) -> pd.DataFrame:
+    return _read_source(name, sheet)
+
+def _read_table(name: str, sheet: str) -> pd.DataFrame:
+    # Memoized per process; editing the Excel file changes its mtime and forces a re-read.
+    # Callers get a copy so their changes never leak into the cache.
+    xlsx_path = os.path.join(DATA_DIR, f"{name}.xlsx")
+    if not os.path.exists(xlsx_path):
+        raise FileNotFoundError(f"Missing required file: {xlsx_path}")
+    return _read_table_cached(name, sheet, os.path.getmtime(xlsx_path)).copy()
+
+def source_version() -> tuple:
+    """Modification times of the source Excel files (None for a missing one); changes whenever a source is edited."""
+    paths = [os.path.join(DATA_DIR, f"{name}.xlsx") for name in REQUIRED_COLS]
+    return tuple(os.path.getmtime(p) if os.path.exists(p) else None for p in paths)
 
 def load_data() -> dict:
-    """Load all Excel files and normalize column names."""
-    demand = _read_excel("demand.xlsx", "demand")
-    stations = _read_excel("stations.xlsx", "stations")
-    times = _read_excel("times.xlsx", "times")
-    training = _read_excel("training.xlsx", "training")
-    products = _read_excel("products.xlsx", "products")
+    """Load all source tables (via their Parquet cache) and normalize column names."""
+    demand = _read_table("demand", "demand")
+    stations = _read_table("stations", "stations")
+    times = _read_table("times", "times")
+    training = _read_table("training", "training")
+    products = _read_table("products", "products")
     
     demand = demand.rename(columns={"Any": "Year", "Mes": "Month", "CodiProjecte": "Product", "Unitats": "Quantity"})
     stations = stations.rename(columns={"CodiProjecte": "Product", "CodiModul": "Subsystem", "UT": "Workcell"})
@@ -48,11 +126,99 @@ def load_data() -> dict:
     training["Trained"] = "Y"
     products = products.rename(columns={"CodiProjecte": "Product", "CodiModul": "Subsystem", "ModulCode": "SubsystemShortDesc"})
     
+    # Downcast: shared categoricals make merges/joins compare integer codes instead of strings
+    frames = (demand, stations, times, training, products)
+    for col in CATEGORY_COLS:
+        cols = [df[col] for df in frames if col in df.columns]
+        if len({c.dtype for c in cols}) > 1:
+            if all(pd.api.types.is_numeric_dtype(c) for c in cols):
+                cols = [c.astype(object) for c in cols] # e.g. int64 vs float64 (NaN) codes: union needs one category dtype
+            else:
+                # A text code in one table (stored as text in its cache) makes the key text in every table
+                cols = [c.astype("string") for c in cols]
+                for df, c in zip([df for df in frames if col in df.columns], cols): df[col] = c
+        dtype = pd.CategoricalDtype(union_categoricals([pd.Categorical(c) for c in cols], sort_categories=True).categories)
+        for df in frames:
+            if col in df.columns: df[col] = df[col].astype(dtype)
+    demand["Quantity"] = pd.to_numeric(demand["Quantity"], downcast="integer")
+    times["Time"] = times["Time"].astype("float32")
+    
     return {"demand": demand, "times": times, "stations": stations, "training": training, "products": products}
 
+def _write_rows_csv(rows: List[dict], path: str) -> None:
+    table = pa.Table.from_pylist(rows)
+    # Floats keep the pandas to_csv formatting (8.0, where Arrow would write 8)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_floating(field.type):
+            text = pa.array([None if v is None else repr(v) for v in table.column(i).to_pylist()], pa.string())
+            table = table.set_column(i, field.name, text)
+    # Same bytes as pandas to_csv: bare header and values, quoting only when a value holds a separator or quote
+    try:
+        with open(path, "wb") as f:
+            f.write((",".join(table.column_names) + "\n").encode("utf-8"))
+            pacsv.write_csv(table, f, pacsv.WriteOptions(include_header=False, quoting_style="none"))
+    except pa.ArrowInvalid:
+        # Arrow cannot quote just the offending values, so quote every string instead
+        pacsv.write_csv(table, path, pacsv.WriteOptions(quoting_style="needed"))
+
 def ensure_output():
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+def _manifest_from_files(output_dir: str) -> List[dict]:
+    """Rebuild the manifest entries from the proposal file names in `output_dir`."""
+    entries = []
+    for name in sorted(os.listdir(output_dir)):
+        m = re.fullmatch(r"planning_week_(\d{8})_proposal(\d+)\.csv", name)
+        if m: entries.append({"monday": datetime.strptime(m[1], "%Y%m%d").date().isoformat(), "proposal_id": int(m[2]), "file": name})
+    return entries
+
+def read_manifest(output_dir: str | None = None) -> List[dict]:
+    """Entries of the proposals manifest, rebuilt from the proposal file names when manifest.json is missing or unreadable.
+
+    Raises FileNotFoundError when `output_dir` itself does not exist.
+    """
+    output_dir = output_dir or OUTPUT_DIR
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), encoding="utf-8") as f: return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        # No manifest yet (e.g. proposals written before it existed) or a damaged one
+        return _manifest_from_files(output_dir)
+
+@contextlib.contextmanager
+def _manifest_lock(path: str):
+    """Serialize manifest updates across threads (in-process lock) and processes (OS lock on `<manifest>.lock`).
+
+    The OS releases the lock when its holder exits, so a crashed run never leaves a stale lock behind.
+    """
+    with _MANIFEST_THREAD_LOCK, open(f"{path}.lock", "a+b") as f:
+        if os.name == "nt":
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1); break
+                except OSError:
+                    pass # LK_LOCK gives up after ~10 s of retries; keep waiting
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                f.seek(0); msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def _update_manifest(monday: date, files: List[str]) -> None:
+    """Replace this week's entries in the proposals manifest (locked, written atomically via tmp + rename)."""
+    path = os.path.join(OUTPUT_DIR, MANIFEST_NAME)
+    with _manifest_lock(path):
+        entries = read_manifest() # seeded from the files on disk when there is no manifest yet
+        entries = [e for e in entries if e["monday"] != monday.isoformat()]
+        entries += [{"monday": monday.isoformat(), "proposal_id": i, "file": os.path.basename(p)} for i, p in enumerate(files, start=1)]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f: json.dump(entries, f, indent=1)
+        os.replace(tmp_path, path)
+
 # ------------------------------
 # Time helpers
 # ------------------------------
@@ -85,17 +251,12 @@ def make_weekly_task_pool(demand_df: pd.DataFrame, times_df: pd.DataFrame, targe
     month_demand = demand_df[(demand_df["Year"] == year) & (demand_df["Month"] == month)]
     if month_demand.empty: return pd.DataFrame()
 
-    subs_by_prod = times_df.groupby("Product")["Subsystem"].apply(list).to_dict()
-    rows = []
-    for _, r in month_demand.iterrows():
-        prod, qty = r["Product"], int(np.ceil(r["Quantity"] * float(demand_multiplier)))
-        if prod not in subs_by_prod: continue
-        daily_target = int(np.ceil(qty / max(1, len(biz_days))))
-        for _ in range(daily_target * 5):
-            for sub in subs_by_prod[prod]:
-                rows.append({"Product": prod, "Subsystem": sub})
-    tasks = pd.DataFrame(rows)
-    return tasks.merge(times_df[["Product", "Subsystem", "Time"]], on=["Product", "Subsystem"], how="left")
+    # One placeholder row per (weekly unit, subsystem): daily target x 5 business days
+    qty = np.ceil(month_demand["Quantity"].to_numpy(dtype=float) * float(demand_multiplier))
+    daily_target = np.ceil(qty / max(1, len(biz_days))).astype(int)
+    counts = month_demand[["Product"]].assign(rep=daily_target * 5)
+    subs_df = times_df[["Product", "Subsystem", "Time"]].merge(counts, on="Product", how="inner")
+    return subs_df.loc[np.repeat(subs_df.index, subs_df["rep"].to_numpy())].drop(columns="rep").reset_index(drop=True)
 
 # ------------------------------
 # Scheduling core
@@ -105,40 +266,80 @@ def make_weekly_task_pool(demand_df: pd.DataFrame, times_df: pd.DataFrame, targe
 class Assignment:
     operator: str; product: str; subsystem: str; workcell: str; start: datetime; end: datetime; duration_h: float
 
-def can_place(new_start: datetime, new_end: datetime, intervals: List[Tuple[datetime, datetime]]) -> bool:
-    return all(new_end <= s or new_start >= e for s, e in intervals)
-
-def place_next_slot(day_start: datetime, max_minutes: int, duration_h: float, step_min: int, occupied: List[Tuple[datetime, datetime]]) -> Tuple[datetime, datetime] | None:
+@dataclass
+class Occupancy:
+    """Busy intervals of one operator or workcell for a day, in minutes from day start (sorted, non-overlapping)."""
+    starts: np.ndarray; ends: np.ndarray; n: int = 0
+
+def new_occupancy(max_minutes: int, step_min: int) -> Occupancy:
+    capacity = max_minutes // step_min + 1 # every interval lasts at least one step
+    return Occupancy(np.empty(capacity, dtype=np.int32), np.empty(capacity, dtype=np.int32))
+
+@njit(cache=True)
+def _fits(starts, ends, n, new_start, new_end):
+    # Intervals never overlap, so only the neighbours around new_start can collide
+    idx = np.searchsorted(starts[:n], new_start)
+    return (idx == 0 or ends[idx - 1] <= new_start) and (idx == n or starts[idx] >= new_end)
+
+@njit(cache=True)
+def find_slot(starts, ends, n, dur, day_end, step):
+    """First start on the step grid where `dur` minutes fit before `day_end` between the n busy intervals, or -1."""
+    t = 0
+    for k in range(n):
+        if t + dur <= starts[k]: break
+        t = max(t, -(-ends[k] // step) * step)
+    return t if t + dur <= day_end else -1
+
+@njit(cache=True)
+def _insert(starts, ends, n, new_start, new_end):
+    idx = np.searchsorted(starts[:n], new_start)
+    for k in range(n, idx, -1):
+        starts[k] = starts[k - 1]; ends[k] = ends[k - 1]
+    starts[idx] = new_start; ends[idx] = new_end
+
+def can_place(new_start: int, new_end: int, occupied: Occupancy) -> bool:
+    return _fits(occupied.starts, occupied.ends, occupied.n, new_start, new_end)
+
+def occupy(occupied: Occupancy, new_start: int, new_end: int) -> None:
+    _insert(occupied.starts, occupied.ends, occupied.n, new_start, new_end)
+    occupied.n += 1
+
+def place_next_slot(max_minutes: int, duration_h: float, step_min: int, occupied: Occupancy) -> Tuple[int, int] | None:
+    """Earliest (start, end) in minutes from day start for `duration_h` hours, or None if the day is full."""
     dur_min = round_up_to_step(int(duration_h * 60), step_min)
     if dur_min == 0: return None
-    t = day_start
-    end_of_day = day_start + timedelta(minutes=max_minutes)
-    while t + timedelta(minutes=dur_min) <= end_of_day:
-        cand_start, cand_end = t, t + timedelta(minutes=dur_min)
-        if can_place(cand_start, cand_end, occupied): return cand_start, cand_end
-        t += timedelta(minutes=step_min)
-    return None
-
-def schedule_day_with_remaining(target_date: date, tasks: pd.DataFrame, trainings: pd.DataFrame, stations: pd.DataFrame, available_operators: Set[str]) -> Tuple[List[Assignment], pd.DataFrame]:
+    start = find_slot(occupied.starts, occupied.ends, occupied.n, dur_min, max_minutes, step_min)
+    return None if start < 0 else (int(start), int(start) + dur_min)
+
+def trained_operators_by_key(trainings: pd.DataFrame) -> Dict[Tuple[str, int], np.ndarray]:
+    """Map (Product, Subsystem) to the operators trained on it, in order of appearance."""
+    trained = trainings[trainings["Trained"] == "Y"]
+    by_key = trained.groupby(["Product", "Subsystem"], observed=True)["Operator"].unique()
+    return {key: np.asarray(ops) for key, ops in by_key.items()}
+
+def schedule_day_with_remaining(target_date: date, tasks: pd.DataFrame, trained_by_key: Dict[Tuple[str, int], np.ndarray], stations_indexed: pd.DataFrame, available_operators: Set[str]) -> Tuple[List[Assignment], pd.DataFrame]:
     weekday = target_date.weekday()
     base_minutes = 480 if weekday < 4 else (360 if weekday == 4 else 0)
     if weekday >= 5 or base_minutes == 0: return [], tasks
 
     avail_min_per_op = {op: base_minutes for op in available_operators}
-    trained = trainings[trainings["Trained"] == "Y"][["Operator", "Product", "Subsystem"]]
-    tasks = tasks.merge(stations[["Product", "Subsystem", "Workcell"]], on=["Product", "Subsystem"], how="left").dropna(subset=["RemainingTime"]).copy().sort_values("RemainingTime", ascending=False)
+    tasks = tasks.join(stations_indexed, on=["Product", "Subsystem"], how="left").dropna(subset=["RemainingTime"]).sort_values("RemainingTime", ascending=False)
     
-    assignments, occ_by_op, occ_by_wc = [], {op: [] for op in available_operators}, {}
-    remaining_rows = []
+    day_start = dt_combine(target_date, START_TIME)
+    assignments, occ_by_op, occ_by_wc = [], {op: new_occupancy(base_minutes, TIME_STEP_MIN) for op in available_operators}, {}
     
-    for _, task in tasks.iterrows():
-        prod, sub, wc, remain_h = task["Product"], task["Subsystem"], task["Workcell"], float(task["RemainingTime"])
-        
-        cand_ops = trained[(trained["Product"] == prod) & (trained["Subsystem"] == sub)]["Operator"].unique()
-        cand_ops = [op for op in cand_ops if op in available_operators and avail_min_per_op.get(op, 0) > 0]
+    # Only tasks with work left and a trained operator available today enter the loop;
+    # the rest are carried over untouched. Leftovers are tracked by position to keep row order.
+    trained_for_day = {key for key, ops in trained_by_key.items() if not available_operators.isdisjoint(ops)}
+    leftover = tasks["RemainingTime"].to_numpy(dtype=float).copy()
+    schedulable = pd.MultiIndex.from_frame(tasks[["Product", "Subsystem"]]).isin(trained_for_day) & (leftover > 0)
+    keep = np.ones(len(tasks), dtype=bool)
+    
+    for pos, (prod, sub, wc, remain_h) in zip(np.flatnonzero(schedulable), tasks.loc[schedulable, ["Product", "Subsystem", "Workcell", "RemainingTime"]].itertuples(index=False, name=None)):
+        remain_h = float(remain_h)
         
-        if not cand_ops or remain_h <= 0:
-            remaining_rows.append({"Product": prod, "Subsystem": sub, "RemainingTime": remain_h}); continue
+        cand_ops = [op for op in trained_by_key[(prod, sub)] if op in available_operators and avail_min_per_op.get(op, 0) > 0]
+        if not cand_ops: continue
         
         scheduled_this_task_h = 0.0
         
@@ -154,88 +355,105 @@ def schedule_day_with_remaining(target_date: date, tasks: pd.DataFrame, training
             op_avail_h = op_avail_min / 60.0
             schedulable_h = min(task_rem_h, op_avail_h)
 
-            day_start = dt_combine(target_date, START_TIME)
-            slot = place_next_slot(day_start, base_minutes, schedulable_h, TIME_STEP_MIN, occ_by_op[op])
+            slot = place_next_slot(base_minutes, schedulable_h, TIME_STEP_MIN, occ_by_op[op])
 
             if slot:
-                cand_start, cand_end = slot
-                occ_by_wc.setdefault(wc, [])
-                if can_place(cand_start, cand_end, occ_by_wc[wc]):
-                    duration_h = (cand_end - cand_start).total_seconds() / 3600.0
+                start_min, end_min = slot
+                if wc not in occ_by_wc: occ_by_wc[wc] = new_occupancy(base_minutes, TIME_STEP_MIN)
+                if can_place(start_min, end_min, occ_by_wc[wc]):
+                    duration_h = (end_min - start_min) / 60.0
+                    cand_start, cand_end = day_start + timedelta(minutes=start_min), day_start + timedelta(minutes=end_min)
                     assignments.append(Assignment(op, prod, sub, wc, cand_start, cand_end, duration_h))
                     
-                    occ_by_op[op].append((cand_start, cand_end)); occ_by_op[op].sort()
-                    occ_by_wc[wc].append((cand_start, cand_end)); occ_by_wc[wc].sort()
+                    occupy(occ_by_op[op], start_min, end_min)
+                    occupy(occ_by_wc[wc], start_min, end_min)
                     
                     used_min = int(duration_h * 60)
                     avail_min_per_op[op] -= used_min
                     scheduled_this_task_h += duration_h
 
-        leftover_h = max(0.0, round(remain_h - scheduled_this_task_h, 2))
-        if leftover_h > 0:
-            remaining_rows.append({"Product": prod, "Subsystem": sub, "RemainingTime": leftover_h})
+        leftover[pos] = max(0.0, round(remain_h - scheduled_this_task_h, 2))
+        keep[pos] = leftover[pos] > 0
 
-    return assignments, pd.DataFrame(remaining_rows)
+    tasks.loc[:, "RemainingTime"] = leftover
+    return assignments, tasks.loc[keep].drop(columns="Workcell").reset_index(drop=True)
 
 def _aggregate_remaining(tasks: pd.DataFrame) -> pd.DataFrame:
     col = "RemainingTime" if "RemainingTime" in tasks.columns else "Time"
-    return tasks.groupby(["Product", "Subsystem"], as_index=False)[col].sum().rename(columns={col: "RemainingTime"})
+    # Hours are summed in float64 even though Time is stored as float32
+    hours = tasks[col].astype("float64").rename("RemainingTime")
+    return hours.groupby([tasks["Product"], tasks["Subsystem"]], observed=True).sum().reset_index()
 
 # ------------------------------
 # Public API
 # ------------------------------
 
-def generate_weekly_proposals(target_date: date, available_operators_by_day: Dict[date, Set[str]], n_proposals: int = 3, demand_uncertainty: float = 0.1) -> List[str]:
+def _generate_one(proposal_id: int, monday: date, demand_multiplier: float, week_path: str, available_operators_by_day: Dict[date, Set[str]],
+                  data: dict, times_indexed: pd.DataFrame, stations_indexed: pd.DataFrame, trained_by_key: Dict[Tuple[str, int], np.ndarray]) -> str:
+    """Schedule one weekly proposal and write it to `week_path` (runs in a worker process)."""
+    base_tasks = make_weekly_task_pool(data["demand"], data["times"], monday, demand_multiplier=demand_multiplier)
+    if base_tasks.empty:
+        _write_rows_csv([], week_path); return week_path
+    
+    remaining = _aggregate_remaining(base_tasks).join(times_indexed, on=["Product", "Subsystem"], how="left")
+    all_assignments = []
+    for offset in range(5):
+        d = monday + timedelta(days=offset)
+        avail_ops = available_operators_by_day.get(d, set())
+        if not avail_ops or remaining.empty: continue
+        
+        daily_assigns, rem_after = schedule_day_with_remaining(d, remaining, trained_by_key, stations_indexed, avail_ops)
+        all_assignments.extend(daily_assigns)
+        remaining = rem_after
+
+    rows = [{"Date": a.start.strftime("%Y-%m-%d"), "ProposalId": proposal_id, "Operator": a.operator, "Product": a.product,
+             "Subsystem": a.subsystem, "Workcell": a.workcell, "Start": a.start.strftime("%Y-%m-%d %H:%M"),
+             "End": a.end.strftime("%Y-%m-%d %H:%M"), "DurationHours": round(a.duration_h, 2)} for a in all_assignments]
+    
+    _write_rows_csv(rows, week_path); return week_path
+
+def generate_weekly_proposals(target_date: date, available_operators_by_day: Dict[date, Set[str]], n_proposals: int = 3, demand_uncertainty: float = 0.1, data: dict | None = None, max_workers: int = 1) -> List[str]:
     ensure_output()
-    data = load_data()
-    files = []
+    if data is None: data = load_data()
     monday = week_monday(target_date)
 
-    for i in range(1, n_proposals + 1):
-        dem_mult = float(np.random.uniform(1 - demand_uncertainty, 1 + demand_uncertainty))
-        base_tasks = make_weekly_task_pool(data["demand"], data["times"], monday, demand_multiplier=dem_mult)
-        week_path = os.path.join(OUTPUT_DIR, f"planning_week_{monday.strftime('%Y%m%d')}_proposal{i}.csv")
-        
-        if base_tasks.empty:
-            pd.DataFrame().to_csv(week_path, index=False); files.append(week_path); continue
-        
-        remaining = _aggregate_remaining(base_tasks)
-        all_assignments = []
-        for offset in range(5):
-            d = monday + timedelta(days=offset)
-            avail_ops = available_operators_by_day.get(d, set())
-            if not avail_ops or remaining.empty: continue
-            
-            tasks_with_times = remaining.merge(data["times"], on=["Product", "Subsystem"], how="left")
-            daily_assigns, rem_after = schedule_day_with_remaining(d, tasks_with_times, data["training"], data["stations"], avail_ops)
-            all_assignments.extend(daily_assigns)
-            remaining = rem_after
-
-        rows = [{"Date": a.start.strftime("%Y-%m-%d"), "ProposalId": i, "Operator": a.operator, "Product": a.product,
-                 "Subsystem": a.subsystem, "Workcell": a.workcell, "Start": a.start.strftime("%Y-%m-%d %H:%M"),
-                 "End": a.end.strftime("%Y-%m-%d %H:%M"), "DurationHours": round(a.duration_h, 2)} for a in all_assignments]
-        
-        pd.DataFrame(rows).to_csv(week_path, index=False); files.append(week_path)
+    # Lookups shared by every proposal and day
+    times_indexed = data["times"].set_index(["Product", "Subsystem"])[["Time"]]
+    stations_indexed = data["stations"].set_index(["Product", "Subsystem"])[["Workcell"]]
+    trained_by_key = trained_operators_by_key(data["training"])
+
+    # Demand multipliers are drawn up front so results do not depend on worker scheduling
+    jobs = [(i, monday, float(np.random.uniform(1 - demand_uncertainty, 1 + demand_uncertainty)),
+             os.path.join(OUTPUT_DIR, f"planning_week_{monday.strftime('%Y%m%d')}_proposal{i}.csv"),
+             available_operators_by_day, data, times_indexed, stations_indexed, trained_by_key) for i in range(1, n_proposals + 1)]
+
+    # Inline by default: a few proposals finish faster than a pool can start workers and compile the kernels,
+    # and threaded hosts such as Streamlit never fork. Batch callers can opt in with max_workers > 1.
+    if max_workers <= 1 or n_proposals <= 1:
+        files = [_generate_one(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, n_proposals)) as ex:
+            futures = [ex.submit(_generate_one, *job) for job in jobs]
+            files = [f.result() for f in futures]
+    _update_manifest(monday, files)
     return files
 
-def summarize_demand(year: int, month: int) -> pd.DataFrame:
-    data = load_data()
+def summarize_demand(year: int, month: int, data: dict | None = None) -> pd.DataFrame:
+    if data is None: data = load_data()
     dmd = data["demand"]
-    month_df = dmd[(dmd["Year"] == year) & (dmd["Month"] == month)].copy()
+    month_df = dmd[(dmd["Year"] == year) & (dmd["Month"] == month)]
     if month_df.empty: return pd.DataFrame()
     
     days = business_days_in_month(year, month)
     iso_weeks = sorted({d.isocalendar().week for d in days})
-    out = []
-    for _, r in month_df.iterrows():
-        monthly = int(r["Quantity"])
-        per_week = int(np.ceil(monthly / max(1, len(iso_weeks))))
-        for ww in iso_weeks:
-            out.append({"Month": month, "Product": r["Product"], "ProductDesc": r.get("DescripcioProjecte", ""),
-                        "MonthlyQty": monthly, "Week": ww, "WeeklyQty": per_week})
-    return pd.DataFrame(out)
-
-def get_all_operators() -> List[tuple]:
-    data = load_data()
-    tr = data["training"][["Operator", "OperatorShortName"]].drop_duplicates().fillna("N/A")
+    weeks = pd.DataFrame({"Week": iso_weeks})
+    out = pd.DataFrame({"Month": month, "Product": month_df["Product"],
+                        "ProductDesc": month_df["DescripcioProjecte"] if "DescripcioProjecte" in month_df.columns else "",
+                        "MonthlyQty": month_df["Quantity"].astype(int)}).merge(weeks, how="cross")
+    out["WeeklyQty"] = np.ceil(out["MonthlyQty"] / max(1, len(iso_weeks))).astype(int)
+    return out
+
+def get_all_operators(data: dict | None = None) -> List[tuple]:
+    if data is None: data = load_data()
+    tr = data["training"][["Operator", "OperatorShortName"]].drop_duplicates().astype(object).fillna("N/A")
     return [(row["Operator"], row["OperatorShortName"]) for _, row in tr.iterrows()]
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""
+End-to-end checks for weekly proposal generation on the sample data in data/.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+import etl
+
+
+class WorkerPoolTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        # Work on a copy so the Parquet cache is not written into the repo
+        etl.DATA_DIR = os.path.join(cls.tmp, "data")
+        shutil.copytree(os.path.join(REPO_DIR, "data"), etl.DATA_DIR, ignore=shutil.ignore_patterns("*.parquet"))
+        cls.data = etl.load_data()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp, ignore_errors=True)
+
+    def generate(self, name, max_workers):
+        etl.OUTPUT_DIR = os.path.join(self.tmp, name)
+        monday = date(2025, 3, 10)
+        operators = {op for op, _ in etl.get_all_operators(data=self.data)}
+        np.random.seed(7)
+        files = etl.generate_weekly_proposals(monday, {monday + timedelta(days=i): operators for i in range(5)},
+                                              n_proposals=3, data=self.data, max_workers=max_workers)
+        return {os.path.basename(f): open(f, "rb").read() for f in files}
+
+    def test_pool_matches_inline_run(self):
+        inline = self.generate("inline", 1)
+        pooled = self.generate("pooled", 2)
+        self.assertEqual(len(inline), 3)
+        self.assertTrue(all(inline.values()))
+        self.assertEqual(pooled, inline)
+        self.assertEqual(len(etl.read_manifest()), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
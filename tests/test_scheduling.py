@@ -0,0 +1,78 @@
+"""
+Equivalence checks for the scheduling kernels.
+
+The slot search jumps from one busy interval to the next instead of trying every
+15-minute start; these tests compare it against that original stepping search
+on random day layouts.
+"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import etl
+
+
+def overlaps(intervals, start, end):
+    return any(start < e and end > s for s, e in intervals)
+
+
+def stepping_slot(intervals, max_minutes, dur, step):
+    """The original search: try every step-aligned start until one fits."""
+    t = 0
+    while t + dur <= max_minutes:
+        if not overlaps(intervals, t, t + dur): return t, t + dur
+        t += step
+    return None
+
+
+def random_layout(rng, max_minutes):
+    """Non-overlapping busy intervals with arbitrary (not always step-aligned) bounds."""
+    intervals, t = [], rng.randrange(0, 60)
+    while t < max_minutes:
+        length = rng.randrange(1, 120)
+        if t + length > max_minutes: break
+        intervals.append((t, t + length))
+        t += length + rng.choice([0, 0, rng.randrange(1, 90)])
+    return intervals
+
+
+class SlotSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(20240501)
+
+    def build(self, intervals, max_minutes, step):
+        occ = etl.new_occupancy(max_minutes, 1)
+        for s, e in self.rng.sample(intervals, len(intervals)): # shuffled inserts must keep the buffers sorted
+            etl.occupy(occ, s, e)
+        self.assertEqual(list(zip(occ.starts[:occ.n], occ.ends[:occ.n])), sorted(intervals))
+        return occ
+
+    def test_place_next_slot_matches_stepping_search(self):
+        for _ in range(2000):
+            max_minutes, step = self.rng.choice([480, 360]), self.rng.choice([5, 15, 30])
+            intervals = random_layout(self.rng, max_minutes)
+            occ = self.build(intervals, max_minutes, step)
+            duration_h = self.rng.choice([0, 0.1, 0.25, 0.5, 1, 1.3, 2, 4, 8])
+            dur = etl.round_up_to_step(int(duration_h * 60), step)
+            expected = stepping_slot(intervals, max_minutes, dur, step) if dur else None
+            self.assertEqual(etl.place_next_slot(max_minutes, duration_h, step, occ), expected, (intervals, duration_h, step))
+
+    def test_can_place_matches_overlap_scan(self):
+        for _ in range(500):
+            intervals = random_layout(self.rng, 480)
+            occ = self.build(intervals, 480, 15)
+            for _ in range(20):
+                start = self.rng.randrange(0, 480)
+                end = start + self.rng.randrange(1, 120)
+                self.assertEqual(etl.can_place(start, end, occ), not overlaps(intervals, start, end), (intervals, start, end))
+
+    def test_full_day_has_no_slot(self):
+        occ = etl.new_occupancy(480, 15)
+        etl.occupy(occ, 0, 480)
+        self.assertIsNone(etl.place_next_slot(480, 0.25, 15, occ))
+
+
+if __name__ == "__main__":
+    unittest.main()